@@ -22,7 +22,8 @@ from tfx.types import channel_utils, standard_artifacts
 from tfx.utils import json_utils
 
 from tfx_addons.sampling.executor import Executor
-from tfx_addons.sampling.spec import SamplerSpec, SamplingStrategy
+from tfx_addons.sampling.spec import (CompressionType, SamplerSpec,
+                                      SamplingStrategy)
 
 
 class Sampler(base_beam_component.BaseBeamComponent):
@@ -36,7 +37,7 @@ class Sampler(base_beam_component.BaseBeamComponent):
   tf.Record format.
 
   The sampling logic uses Python's random module:
-  undersampling uses random.sample, and oversampling uses
+  undersampling uses reservoir sampling, and oversampling uses
   random.choices. Support for more complex sampling algorithms may
   be added at a later date.
 
@@ -73,7 +74,8 @@ class Sampler(base_beam_component.BaseBeamComponent):
       copy_others: Optional[bool] = True,
       shards: Optional[int] = 0,
       null_classes: Optional[List[Text]] = None,
-      sampling_strategy: SamplingStrategy = SamplingStrategy.UNDERSAMPLE):
+      sampling_strategy: SamplingStrategy = SamplingStrategy.UNDERSAMPLE,
+      compression_type: CompressionType = CompressionType.GZIP):
     """Construct a SamplerComponent.
 
     Args:
@@ -89,6 +91,11 @@ class Sampler(base_beam_component.BaseBeamComponent):
       shards: The number of files that each sampled split should
         contain. Default 0 is Beam's tfrecordio function's default.
       null_classes: A list determining which classes that we should not sample.
+      sampling_strategy: An enum of type SamplingStrategy, determining if
+        the executor should over or undersample.
+      compression_type: An enum of type CompressionType, determining how the
+        sampled files are compressed. Defaults to GZIP; UNCOMPRESSED files
+        are larger, but faster to read and can be split by Beam readers.
     """
 
     if not output_data:
@@ -104,6 +111,7 @@ class Sampler(base_beam_component.BaseBeamComponent):
         shards=shards,
         null_classes=json_utils.dumps(null_classes),
         sampling_strategy=sampling_strategy,
+        compression_type=compression_type,
     )
 
     super().__init__(spec=spec)
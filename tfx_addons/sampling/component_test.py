@@ -51,7 +51,8 @@ class ComponentTest(absltest.TestCase):
         spec.SAMPLER_SPLIT_KEY: ['train', 'eval'],
         spec.SAMPLER_COPY_KEY: False,
         spec.SAMPLER_SHARDS_KEY: 10,
-        spec.SAMPLER_CLASSES_KEY: ['label']
+        spec.SAMPLER_CLASSES_KEY: ['label'],
+        spec.SAMPLER_COMPRESSION_KEY: spec.CompressionType.UNCOMPRESSED
     }
 
     under = component.Sampler(**params)
@@ -68,6 +69,8 @@ class ComponentTest(absltest.TestCase):
     self.assertEqual(under.spec.exec_properties[spec.SAMPLER_SHARDS_KEY], 10)
     self.assertEqual(under.spec.exec_properties[spec.SAMPLER_CLASSES_KEY],
                      json_utils.dumps(['label']))
+    self.assertEqual(under.spec.exec_properties[spec.SAMPLER_COMPRESSION_KEY],
+                     spec.CompressionType.UNCOMPRESSED)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,258 @@
+# Copyright 2021 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Pure-Python decoder that reads a single feature of a serialized tf.Example.
+
+The sampler only needs the class label of each example, so instead of parsing
+the whole proto with TensorFlow, this module walks the protobuf wire format of
+the example and only decodes the requested feature. The relevant messages are:
+
+  Example { Features features = 1; }
+  Features { map<string, Feature> feature = 1; }
+  Feature { oneof kind { BytesList bytes_list = 1; FloatList float_list = 2;
+                         Int64List int64_list = 3; } }
+  BytesList { repeated bytes value = 1; }
+  Int64List { repeated int64 value = 1 [packed = true]; }
+
+where each map entry is encoded as a message { string key = 1; Feature value
+= 2; }.
+"""
+
+import functools
+
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_FIXED32 = 5
+
+# Keys of length-delimited fields 1 and 2, as (field_number << 3) | wire_type.
+_MESSAGE_FIELD_1 = 0x0a
+_MESSAGE_FIELD_2 = 0x12
+
+_BYTES_LIST = 1
+_INT64_LIST = 3
+
+
+def _read_varint(buf, pos):
+  """Decodes the varint starting at pos, and returns it with the position of
+  the next byte."""
+
+  result = 0
+  shift = 0
+  while True:
+    byte = buf[pos]
+    pos += 1
+    result |= (byte & 0x7f) << shift
+    if not byte & 0x80:
+      return result, pos
+    shift += 7
+
+
+def _iter_fields(buf, pos, end):
+  """Yields the (field_number, wire_type, value) fields of the message stored
+  in buf[pos:end]. The value is an int for varints, a (start, end) span for
+  length-delimited fields, and None for fixed-size fields."""
+
+  while pos < end:
+    key, pos = _read_varint(buf, pos)
+    wire_type = key & 0x7
+    if wire_type == _VARINT:
+      value, pos = _read_varint(buf, pos)
+    elif wire_type == _LENGTH_DELIMITED:
+      length, pos = _read_varint(buf, pos)
+      value = (pos, pos + length)
+      pos += length
+    elif wire_type == _FIXED64:
+      value = None
+      pos += 8
+    elif wire_type == _FIXED32:
+      value = None
+      pos += 4
+    else:
+      raise ValueError(f"Unsupported wire type {wire_type} in tf.Example!")
+    yield key >> 3, wire_type, value
+  if pos != end:
+    raise ValueError("Truncated message in tf.Example!")
+
+
+def _skip_field(buf, pos, key):
+  """Returns the position right after the value of the field with the given
+  key, which starts at pos."""
+
+  wire_type = key & 0x7
+  if wire_type == _VARINT:
+    return _read_varint(buf, pos)[1]
+  if wire_type == _LENGTH_DELIMITED:
+    length, pos = _read_varint(buf, pos)
+    return pos + length
+  if wire_type == _FIXED64:
+    return pos + 8
+  if wire_type == _FIXED32:
+    return pos + 4
+  raise ValueError(f"Unsupported wire type {wire_type} in tf.Example!")
+
+
+def _find_feature(buf, key):
+  """Returns the span of the Feature stored under key in the serialized
+  tf.Example buf, an empty span if the key maps to an empty Feature, or None if
+  the key is absent. As with protobuf maps, the last entry for a key wins.
+
+  This is the hot loop of the decoder, so it is written without generators or
+  helper calls for the common case, where varints fit in a single byte and map
+  entries hold the key field followed by the value field. Anything else falls
+  back to the generic field iterator."""
+
+  if key not in buf:
+    return None
+
+  key_len = len(key)
+  found = None
+  pos, end = 0, len(buf)
+  while pos < end:
+    tag, pos = _read_varint(buf, pos)
+    if tag != _MESSAGE_FIELD_1:
+      pos = _skip_field(buf, pos, tag)
+      continue
+    length = buf[pos]
+    if length < 0x80:
+      pos += 1
+    else:
+      length, pos = _read_varint(buf, pos)
+    features_end = pos + length
+    if features_end > end:
+      raise ValueError("Truncated message in tf.Example!")
+
+    while pos < features_end:
+      tag = buf[pos]
+      if tag != _MESSAGE_FIELD_1:
+        tag, pos = _read_varint(buf, pos)
+        pos = _skip_field(buf, pos, tag)
+        continue
+      length = buf[pos + 1]
+      if length < 0x80:
+        pos += 2
+      else:
+        length, pos = _read_varint(buf, pos + 1)
+      entry_end = pos + length
+      if entry_end > features_end:
+        raise ValueError("Truncated message in tf.Example!")
+
+      # Common case: a key field then a value field, both with short lengths.
+      if buf[pos] == _MESSAGE_FIELD_1 and buf[pos + 1] < 0x80:
+        value_pos = pos + 2 + buf[pos + 1]
+        if value_pos == entry_end:
+          value_start = entry_end
+        elif buf[value_pos] == _MESSAGE_FIELD_2:
+          length = buf[value_pos + 1]
+          if length < 0x80:
+            value_start = value_pos + 2
+          else:
+            length, value_start = _read_varint(buf, value_pos + 1)
+          if value_start + length != entry_end:
+            value_start = None
+        else:
+          value_start = None
+        if value_start is not None:
+          if (buf[pos + 1] == key_len and buf.startswith(key, pos + 2)):
+            found = (value_start, entry_end)
+          pos = entry_end
+          continue
+
+      entry_key = None
+      entry_value = (0, 0)
+      for item_field, item_wire_type, span in _iter_fields(buf, pos, entry_end):
+        if item_wire_type != _LENGTH_DELIMITED:
+          continue
+        if item_field == 1:
+          entry_key = span
+        elif item_field == 2:
+          entry_value = span
+      if (entry_key is not None and entry_key[1] - entry_key[0] == key_len
+          and buf.startswith(key, entry_key[0])):
+        found = entry_value
+      pos = entry_end
+
+    if pos != features_end:
+      raise ValueError("Truncated message in tf.Example!")
+  return found
+
+
+def _extract_label(key, serialized):
+  """Decodes the feature stored under the encoded key, as in extract_label."""
+
+  try:
+    feature = _find_feature(serialized, key)
+    if feature is None:
+      return None
+
+    kind = None
+    values = []
+    for field, wire_type, span in _iter_fields(serialized, *feature):
+      if wire_type != _LENGTH_DELIMITED:
+        continue
+      # Only one kind of list may be set, and a later one replaces an earlier
+      # one, whereas repeated occurrences of the same kind are merged.
+      if field != kind:
+        kind = field
+        values = []
+      if kind not in (_BYTES_LIST, _INT64_LIST):
+        continue
+      for item_field, item_wire_type, value in _iter_fields(serialized, *span):
+        if item_field != 1:
+          continue
+        if kind == _BYTES_LIST and item_wire_type == _LENGTH_DELIMITED:
+          values.append(serialized[value[0]:value[1]])
+        elif kind == _INT64_LIST and item_wire_type == _VARINT:
+          values.append(value)
+        elif kind == _INT64_LIST and item_wire_type == _LENGTH_DELIMITED:
+          pos, end = value
+          while pos < end:
+            value, pos = _read_varint(serialized, pos)
+            values.append(value)
+  except IndexError as e:
+    raise ValueError("Truncated message in tf.Example!") from e
+
+  if not values:
+    return None
+  if kind == _INT64_LIST:
+    # int64 values are encoded as 64-bit two's complement varints.
+    return values[0] - (1 << 64) if values[0] >= 1 << 63 else values[0]
+  return values[0].decode()
+
+
+def extract_label(serialized, label):
+  """Function that fetches the class label from a serialized tf.Example,
+  without parsing any other feature.
+
+  Args:
+    serialized: a tf.Example in serialized format (bytes).
+    label: string containing the name of the feature to extract.
+  Returns:
+    The first value of the feature if it is a non-empty int64 list, the first
+    value decoded as a string if it is a non-empty bytes list, and None
+    otherwise.
+  """
+
+  return _extract_label(label.encode(), serialized)
+
+
+def make_label_extractor(label):
+  """Function that returns an equivalent of extract_label specialized for one
+  label, taking only the serialized tf.Example as argument.
+
+  The feature key is encoded once and bound with functools.partial, so that
+  calling the extractor on every example costs no extra Python frame.
+  """
+
+  return functools.partial(_extract_label, label.encode())
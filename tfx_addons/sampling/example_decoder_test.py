@@ -0,0 +1,76 @@
+# Copyright 2021 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for the sampling component's tf.Example decoder."""
+
+import tensorflow as tf
+from absl.testing import absltest
+
+from tfx_addons.sampling import example_decoder
+
+
+def _make_example(**features):
+  example = tf.train.Example()
+  for key, value in features.items():
+    feature = example.features.feature[key]
+    if value is None:
+      feature.SetInParent()
+    elif isinstance(value[0], int):
+      feature.int64_list.value.extend(value)
+    elif isinstance(value[0], float):
+      feature.float_list.value.extend(value)
+    else:
+      feature.bytes_list.value.extend(v.encode() for v in value)
+  return example.SerializeToString()
+
+
+class ExampleDecoderTest(absltest.TestCase):
+  def testIntLabel(self):
+    for value in (0, 1, 5, 300, -1, -(1 << 63), (1 << 63) - 1):
+      serialized = _make_example(x=[1.0], label=[value, 7], y=["a"])
+      self.assertEqual(example_decoder.extract_label(serialized, 'label'),
+                       value)
+
+  def testBytesLabel(self):
+    serialized = _make_example(label=["cat", "dog"], x=[1.0])
+    self.assertEqual(example_decoder.extract_label(serialized, 'label'), "cat")
+    extract_label = example_decoder.make_label_extractor('label')
+    self.assertEqual(extract_label(serialized), "cat")
+    serialized = _make_example(label=["ünïcode"])
+    self.assertEqual(example_decoder.extract_label(serialized, 'label'),
+                     "ünïcode")
+
+  def testMissingLabel(self):
+    self.assertIsNone(
+        example_decoder.extract_label(_make_example(x=[1.0]), 'label'))
+    self.assertIsNone(
+        example_decoder.extract_label(_make_example(label=None), 'label'))
+    self.assertIsNone(
+        example_decoder.extract_label(_make_example(label=[1.0]), 'label'))
+    self.assertIsNone(
+        example_decoder.extract_label(_make_example(labels=[1]), 'label'))
+    self.assertIsNone(example_decoder.extract_label(b"", 'label'))
+
+  def testLastEntryWins(self):
+    serialized = (_make_example(label=[1]) + _make_example(label=["a"]))
+    self.assertEqual(example_decoder.extract_label(serialized, 'label'), "a")
+
+  def testTruncated(self):
+    serialized = _make_example(label=["cat"])
+    with self.assertRaises(ValueError):
+      example_decoder.extract_label(serialized[:-1], 'label')
+
+
+if __name__ == '__main__':
+  tf.test.main()
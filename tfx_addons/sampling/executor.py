@@ -14,19 +14,36 @@
 # ==============================================================================
 """Executor for Sampler component."""
 
+import array
+import math
 import os
 import random
+import re
 from typing import Any, Dict, List, Text
 
 import apache_beam as beam
-import tensorflow as tf
+from apache_beam.io import fileio as beam_fileio
 from tfx import types
 from tfx.dsl.components.base import base_beam_executor
 from tfx.dsl.io import fileio
 from tfx.types import artifact_utils
 from tfx.utils import io_utils, json_utils
 
-from tfx_addons.sampling import spec
+from tfx_addons.sampling import example_decoder, spec
+
+# Number of intermediate keys each class is spread over before combining.
+_COMBINE_FANOUT = 32
+
+# Beam compression type and file suffix of each supported output compression.
+_COMPRESSION_TYPES = {
+    spec.CompressionType.GZIP:
+    (beam.io.filesystem.CompressionTypes.GZIP, ".gz"),
+    spec.CompressionType.UNCOMPRESSED:
+    (beam.io.filesystem.CompressionTypes.UNCOMPRESSED, ""),
+}
+
+# Magic number at the start of every GZIP file.
+_GZIP_MAGIC = b"\x1f\x8b"
 
 
 class Executor(base_beam_executor.BaseBeamExecutor):
@@ -71,6 +88,8 @@ class Executor(base_beam_executor.BaseBeamExecutor):
           not sample. Defaults to None.
         - sampling_strategy: An enum of type SamplingStrategy, determining if
           the executor should over or undersample.
+        - compression_type: An enum of type CompressionType, determining how
+          the sampled files are compressed. Defaults to GZIP.
     Returns:
       None
     """
@@ -83,6 +102,8 @@ class Executor(base_beam_executor.BaseBeamExecutor):
     copy_others = exec_properties[spec.SAMPLER_COPY_KEY]
     shards = exec_properties[spec.SAMPLER_SHARDS_KEY]
     null_classes = json_utils.loads(exec_properties[spec.SAMPLER_CLASSES_KEY])
+    compression_type = exec_properties.get(spec.SAMPLER_COMPRESSION_KEY,
+                                           spec.CompressionType.GZIP)
 
     input_artifact = artifact_utils.get_single_instance(
         input_dict[spec.SAMPLER_INPUT_KEY])
@@ -104,6 +125,9 @@ class Executor(base_beam_executor.BaseBeamExecutor):
     if shards < 0:
       raise ValueError("Shards value must be non-negative!")
 
+    if compression_type not in _COMPRESSION_TYPES:
+      raise ValueError("Invalid compression type!")
+
     if copy_others:
       output_artifact.split_names = input_artifact.split_names
     else:
@@ -122,42 +146,45 @@ class Executor(base_beam_executor.BaseBeamExecutor):
         with self._CreatePipeline(split_dir) as p:
           data = read_tfexamples(p, uri, label)
           merged = sample_examples(data, null_classes, sampling_strategy)
-          write_tfexamples(merged, shards, split_dir)
+          write_tfexamples(merged, shards, split_dir, compression_type)
       elif copy_others:  # Copy the other split if copy_others is True
         input_dir = uri
         output_dir = artifact_utils.get_split_uri([output_artifact], split)
-        for filename in fileio.listdir(input_dir):
-          input_uri = os.path.join(input_dir, filename)
-          output_uri = os.path.join(output_dir, filename)
-          io_utils.copy_file(src=input_uri, dst=output_uri, overwrite=True)
+        filenames = fileio.listdir(input_dir)
+        with self._CreatePipeline(output_dir) as p:
+          _ = (p
+               | "ListFiles" >> beam.Create(filenames)
+               | "ReshuffleFiles" >> beam.Reshuffle()
+               | "CopyFiles" >> beam.Map(
+                   _copy_file, input_dir=input_dir, output_dir=output_dir))
+
+
+def _copy_file(filename, input_dir, output_dir):
+  """Function that copies one file of a split to the output split, so that the
+  files of a split can be copied in parallel."""
+
+  io_utils.copy_file(src=os.path.join(input_dir, filename),
+                     dst=os.path.join(output_dir, filename),
+                     overwrite=True)
 
 
-def _generate_elements(example, label):
+def _generate_elements(example, extract_label):
   """Function that fetches the class label from a tf.Example and returns one
   item in a K-V PCollection with the key as the label and the value as the
-  string-parsed tf.Example.
+  serialized tf.Example.
 
   Args:
     example: a tf.Example in serialized format, taken directly from a
-      TFRecordDataset.
-    label: string containing the name of the categorical variable that we are
-      extracting from the example.
+      TFRecord file.
+    extract_label: function returning the class label of a serialized
+      tf.Example, as built by example_decoder.make_label_extractor for the
+      categorical variable that we are extracting from the example.
   Returns:
     Tuple with two items. First item is a class label; second item is the input
-      tf.Example, deserialized and parsed from string format.
+      tf.Example, kept in serialized format so that only the label is parsed.
   """
 
-  class_label = None
-  parsed = tf.train.Example.FromString(example.numpy())
-  if parsed.features.feature[label].int64_list.value:
-    val = parsed.features.feature[label].int64_list.value
-    if len(val) > 0:
-      class_label = val[0]
-  else:
-    val = parsed.features.feature[label].bytes_list.value
-    if len(val) > 0:
-      class_label = val[0].decode()
-  return (class_label, parsed)
+  return (extract_label(example), example)
 
 
 def sample_data(_,
@@ -166,12 +193,30 @@ def sample_data(_,
                 side=0):
   """Function called in a Beam pipeline that performs sampling using Python's
   random module on an input key:value pair, where the key is the class label
-  and the values are the data points to sample. Note that the key is discarded."""
+  and the values are the data points to sample. Note that the key is discarded.
+
+  The values are streamed in a single pass rather than copied into a list:
+  undersampling keeps a reservoir of side values (Algorithm R), and
+  oversampling draws the indices to keep first, walks the values once to
+  collect the drawn ones, and yields them in draw order, which requires val
+  to support len()."""
 
   if sampling_strategy == spec.SamplingStrategy.UNDERSAMPLE:
-    random_sample_data = random.sample(val, side)
+    random_sample_data = []
+    for i, item in enumerate(val):
+      if i < side:
+        random_sample_data.append(item)
+      else:
+        j = random.randrange(i + 1)
+        if j < side:
+          random_sample_data[j] = item
+    if len(random_sample_data) < side:
+      raise ValueError("Sample larger than population!")
   elif sampling_strategy == spec.SamplingStrategy.OVERSAMPLE:
-    random_sample_data = random.choices(val, k=side)
+    indices = random.choices(range(len(val)), k=side)
+    drawn = set(indices)
+    items = {i: item for i, item in enumerate(val) if i in drawn}
+    random_sample_data = (items[i] for i in indices)
   else:
     raise ValueError("Invalid value for sampling_strategy variable!")
 
@@ -179,6 +224,229 @@ def sample_data(_,
     yield item
 
 
+def _random_open():
+  """Returns a random float in the open interval (0, 1)."""
+  u = random.random()
+  while u == 0.0:
+    u = random.random()
+  return u
+
+
+class _ByteReservoir(object):
+  """Reservoir of serialized examples stored as one contiguous buffer.
+
+  Values are appended to a single bytearray and located through an array of
+  offsets, so the reservoir only holds a handful of Python objects however
+  many values it contains. Since a replacement value may not have the same
+  size as the one it replaces, replacements are kept aside by slot and folded
+  back into the buffer once they make up half of the reservoir.
+  """
+  def __init__(self):
+    self.offsets = array.array('Q', [0])
+    self.blob = bytearray()
+    self.replaced = {}
+
+  def __len__(self):
+    return len(self.offsets) - 1
+
+  def __getitem__(self, i):
+    if i in self.replaced:
+      return self.replaced[i]
+    with memoryview(self.blob) as blob:
+      return bytes(blob[self.offsets[i]:self.offsets[i + 1]])
+
+  def __setitem__(self, i, value):
+    self.replaced[i] = value
+    if len(self.replaced) > len(self) // 2:
+      self.compact()
+
+  def __iter__(self):
+    for i in range(len(self)):
+      yield self[i]
+
+  def append(self, value):
+    self.blob.extend(value)
+    self.offsets.append(len(self.blob))
+
+  def extend(self, other):
+    other.compact()
+    base = len(self.blob)
+    self.blob.extend(other.blob)
+    self.offsets.extend(base + offset for offset in other.offsets[1:])
+
+  def compact(self):
+    """Folds the replaced values back into the buffer, in slot order."""
+    if not self.replaced:
+      return
+    blob = memoryview(self.blob)
+    compacted = _ByteReservoir()
+    for i in range(len(self)):
+      if i in self.replaced:
+        compacted.append(self.replaced[i])
+      else:
+        compacted.append(blob[self.offsets[i]:self.offsets[i + 1]])
+    blob.release()
+    self.offsets, self.blob = compacted.offsets, compacted.blob
+    self.replaced = {}
+
+
+class ReservoirSampleFn(beam.CombineFn):
+  """CombineFn that counts the values of a key and keeps a uniform random
+  sample of at most k of them.
+
+  The accumulator is a [count, reservoir, w, skip] list, where count is the
+  number of values seen so far and reservoir is a _ByteReservoir holding at
+  most k of them, so the combiner never buffers more than k values of a key.
+  Values must be serialized examples (bytes). Once the reservoir is full,
+  values are added using Vitter's Algorithm L: w is the current acceptance
+  threshold and skip is the number of upcoming values to discard before the
+  next replacement, so random numbers are only drawn for accepted values. Two
+  reservoirs are merged by drawing from each in proportion to its count.
+  The sample size k is passed in as a side input to every method, and the
+  output is a (count, reservoir) tuple.
+  """
+  def _reset_skip(self, accumulator):
+    # log1p keeps the denominator non-zero once w drops below float epsilon.
+    accumulator[3] = math.floor(
+        math.log(_random_open()) / math.log1p(-accumulator[2]))
+
+  def create_accumulator(self, *unused_args):
+    return [0, _ByteReservoir(), None, 0]
+
+  def add_input(self, accumulator, element, k):
+    count, reservoir = accumulator[0], accumulator[1]
+    accumulator[0] = count + 1
+    if count < k:
+      reservoir.append(element)
+      if count + 1 == k:
+        accumulator[2] = math.exp(math.log(_random_open()) / k)
+        self._reset_skip(accumulator)
+    elif accumulator[3]:
+      accumulator[3] -= 1
+    else:
+      reservoir[random.randrange(k)] = element
+      accumulator[2] *= math.exp(math.log(_random_open()) / k)
+      self._reset_skip(accumulator)
+    return accumulator
+
+  def merge_accumulators(self, accumulators, k):
+    accumulators = iter(accumulators)
+    count, reservoir, _, _ = next(accumulators)
+    for other_count, other_reservoir, _, _ in accumulators:
+      # Draw min(k, total) values without replacement from the union of both
+      # inputs, tracking how many of the draws land in each reservoir.
+      size = min(k, count + other_count)
+      left, right = count, other_count
+      taken = 0
+      for _ in range(size):
+        if random.randrange(left + right) < left:
+          left -= 1
+          taken += 1
+        else:
+          right -= 1
+      merged_reservoir = _ByteReservoir()
+      for i in random.sample(range(len(reservoir)), taken):
+        merged_reservoir.append(reservoir[i])
+      for i in random.sample(range(len(other_reservoir)), size - taken):
+        merged_reservoir.append(other_reservoir[i])
+      reservoir = merged_reservoir
+      count += other_count
+    merged = [count, reservoir, None, 0]
+    if count >= k > 0:
+      # The threshold of a full reservoir is the k-th smallest of count
+      # uniform priorities, which follows a Beta(k, count - k + 1) law.
+      merged[2] = random.betavariate(k, count - k + 1)
+      self._reset_skip(merged)
+    return merged
+
+  def extract_output(self, accumulator, *unused_args):
+    accumulator[1].compact()
+    return (accumulator[0], accumulator[1])
+
+
+class MergeReservoirsFn(ReservoirSampleFn):
+  """CombineFn that merges the (count, reservoir) outputs of ReservoirSampleFn
+  for the same key into a single uniform random sample of at most k values.
+
+  This is the second level of a hot key fanout: ReservoirSampleFn is first
+  run on several intermediate keys per class, and their partial samples are
+  then merged per class. Beam's with_hot_key_fanout cannot be used since the
+  sample size is a side input.
+  """
+  def add_input(self, accumulator, element, k):
+    count, sample = element
+    # merge_accumulators only needs len() and indexing on the reservoirs, so
+    # the sample is merged as is.
+    return self.merge_accumulators([accumulator, [count, sample, None, 0]], k)
+
+
+def find_target_size(counts, sampling_strategy):
+  """Function that returns the number of examples that every class is sampled
+  to, given the counts of all classes: the smallest count for undersampling,
+  or the largest one for oversampling."""
+
+  if sampling_strategy == spec.SamplingStrategy.UNDERSAMPLE:
+    return min(counts or [0])
+  return max(counts or [0])
+
+
+def count_target_size(data, sampling_strategy):
+  """Function that counts the examples of every class in a K-V PCollection of
+  non-null items, and returns a singleton PCollection with the number of
+  examples that every class is sampled to, as given by find_target_size.
+
+  The target feeds the reservoir combine as its capacity, so it has to be
+  computed beforehand rather than in a combine over the reservoirs; the
+  counts are small, and Count.PerKey is lifted before its shuffle."""
+
+  return (data
+          | "CountPerKey" >> beam.combiners.Count.PerKey()
+          | "Values" >> beam.Values()
+          | "GetSample" >> beam.CombineGlobally(find_target_size,
+                                                sampling_strategy))
+
+
+def _sample_reservoir(label, sample, side=0):
+  """Function that samples the reservoir of a class to side examples. The
+  reservoir is already a uniform sample of side examples if the class has at
+  least that many, and otherwise holds the whole class, which is then
+  oversampled."""
+
+  if len(sample) >= side:
+    sampling_strategy = spec.SamplingStrategy.UNDERSAMPLE
+  else:
+    sampling_strategy = spec.SamplingStrategy.OVERSAMPLE
+  return sample_data(label,
+                     sample,
+                     sampling_strategy=sampling_strategy,
+                     side=side)
+
+
+def _add_fanout_key(item, fanout):
+  """Function that spreads the items of a K-V PCollection over fanout
+  intermediate keys per key."""
+
+  return ((item[0], random.randrange(fanout)), item[1])
+
+
+def _null_set(null_vals=None):
+  """Function that builds the frozenset of class labels that filter_null
+  considers as null: None, the empty string, and every value in null_vals.
+
+  Since class labels are either ints or strings, each value in null_vals that
+  is the string form of an int is also added as that int, so that labels can
+  be checked with a single set lookup instead of being converted to strings.
+  """
+
+  null_set = {None, ""}
+  for val in null_vals or ():
+    null_set.add(val)
+    if isinstance(val, str) and re.fullmatch(r"-?[0-9]+", val):
+      if str(int(val)) == val:
+        null_set.add(int(val))
+  return frozenset(null_set)
+
+
 def filter_null(item, keep_null=False, null_vals=None):
   """Function that returns or doesn't return the inputted item if its first
   value is either a False value or is in the inputted null_vals list.
@@ -198,89 +466,181 @@ def filter_null(item, keep_null=False, null_vals=None):
     keep_null: Determines whether we keep False/"null" values or True/not
       "null" values.
     null_vals: List containing values that should be considered as False/"null".
+      May also be a frozenset built by _null_set, which avoids rebuilding the
+      set on every call.
   Returns:
     None or the inputted item, depending on if the item is False/in null_vals,
       and then depending on the value of keep_null.
   """
 
-  if item[0] == 0:
-    keep = True
-  else:
-    keep = bool(item[0])
-
-  if null_vals and str(item[0]) in null_vals and keep:
-    keep = False
-  keep ^= keep_null
+  if not isinstance(null_vals, frozenset):
+    null_vals = _null_set(null_vals)
+  keep = (item[0] not in null_vals) ^ keep_null
 
   return item if keep else None
 
 
-def read_tfexamples(p, uri, label):
-  """Function that reads tf.Examples from tfRecord files and converts them
-  to a K-V PCollection usable by Beam."""
+class PartitionByNullDoFn(beam.DoFn):
+  """DoFn that checks the class label of each K-V item once with filter_null,
+  and routes the item to the "valued" output, or its example alone to the
+  "null" output if the label is null. The set of null labels is built once
+  per DoFn rather than on every call."""
+  def __init__(self, null_vals=None):
+    super().__init__()
+    self._null_vals = _null_set(null_vals)
 
-  dataset = tf.data.TFRecordDataset(tf.data.Dataset.list_files(f'{uri}/*'),
-                                    compression_type="GZIP")
+  def process(self, element):
+    if filter_null(element, null_vals=self._null_vals):
+      yield beam.pvalue.TaggedOutput("valued", element)
+    else:
+      yield beam.pvalue.TaggedOutput("null", element[1])
 
-  # Take the input TFRecordDataset and extract the class label that we want.
+
+def _is_gzip_without_extension(path):
+  """Function that returns whether a TFRecord shard is a GZIP file without a
+  file extension telling so, by checking the GZIP magic number at its start.
+  Shards with a known compression extension are left to Beam's detection."""
+
+  compression_types = beam.io.filesystem.CompressionTypes
+  if (compression_types.detect_compression_type(path) !=
+      compression_types.UNCOMPRESSED):
+    return False
+  with beam.io.filesystems.FileSystems.open(
+      path, compression_type=compression_types.UNCOMPRESSED) as f:
+    return f.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC
+
+
+def read_tfexamples(
+    p,
+    uri,
+    label,
+    compression_type=beam.io.filesystem.CompressionTypes.AUTO):
+  """Function that reads tf.Examples from tfRecord files and converts them
+  to a K-V PCollection usable by Beam.
+
+  The shards of the split are matched inside the pipeline and spread over the
+  workers, so that each file is read in parallel and nothing is materialized
+  on the driver beforehand. GZIP files cannot be split, so a split stored as a
+  single large GZIP file is still read by one worker, and should be sharded
+  beforehand. By default, the compression of each shard is inferred from its
+  file extension, and shards without one are read as GZIP if they start with
+  the GZIP magic number, and as uncompressed otherwise. This covers both the
+  GZIP files written by ExampleGen and the uncompressed files that the Sampler
+  may write."""
+
+  # Read the serialized tf.Examples and extract the class label that we want.
   # Output format is a K-V PCollection: {class_label: TFRecord in string format}
-  data = (p
-          | "DatasetToPCollection" >> beam.Create(dataset)
-          | "MapToLabel" >> beam.Map(_generate_elements, label))
+  shards = (p
+            | "MatchShards" >> beam_fileio.MatchFiles(f'{uri}/*')
+            | "ShardPaths" >> beam.Map(lambda metadata: metadata.path)
+            | "ReshuffleShards" >> beam.Reshuffle())
+
+  if compression_type == beam.io.filesystem.CompressionTypes.AUTO:
+    gzip_shards, other_shards = (
+        shards
+        | "DetectCompression" >> beam.Partition(
+            lambda path, _: 0 if _is_gzip_without_extension(path) else 1, 2))
+    gzip_examples = (
+        gzip_shards
+        | "ReadGzipFromTFRecord" >> beam.io.ReadAllFromTFRecord(
+            compression_type=beam.io.filesystem.CompressionTypes.GZIP,
+            coder=beam.coders.BytesCoder()))
+    other_examples = (other_shards
+                      | "ReadFromTFRecord" >> beam.io.ReadAllFromTFRecord(
+                          compression_type=compression_type,
+                          coder=beam.coders.BytesCoder()))
+    examples = ((gzip_examples, other_examples)
+                | "MergeShards" >> beam.Flatten())
+  else:
+    examples = (shards
+                | "ReadFromTFRecord" >> beam.io.ReadAllFromTFRecord(
+                    compression_type=compression_type,
+                    coder=beam.coders.BytesCoder()))
+
+  data = (examples
+          | "MapToLabel" >> beam.Map(
+              _generate_elements,
+              example_decoder.make_label_extractor(label)))
   return data
 
 
 def sample_examples(data, null_classes, sampling_strategy):
-  """Function that performs the sampling given a label-mapped dataset."""
-
-  # Finds the minimum frequency of all classes in the input label.
-  # Output is a singleton PCollection with the minimum # of examples.
+  """Function that performs the sampling given a label-mapped dataset.
 
-  def find_minimum(elements):
-    return min(elements or [0])
+  Every class is sampled to the size of the smallest class (undersampling) or
+  of the largest class (oversampling), and no more than that many examples of
+  a class are held in memory while sampling."""
 
-  def find_maximum(elements):
-    return max(elements or [0])
-
-  if sampling_strategy == spec.SamplingStrategy.UNDERSAMPLE:
-    sample_fn = find_minimum
-  elif sampling_strategy == spec.SamplingStrategy.OVERSAMPLE:
-    sample_fn = find_maximum
-  else:
+  if sampling_strategy not in (spec.SamplingStrategy.UNDERSAMPLE,
+                               spec.SamplingStrategy.OVERSAMPLE):
     raise ValueError("Invalid value for sampling_strategy variable!")
 
-  val = (data
-         | "CountPerKey" >> beam.combiners.Count.PerKey()
-         | "FilterNullCount" >>
-         beam.Filter(lambda x: filter_null(x, null_vals=null_classes))
-         | "Values" >> beam.Values()
-         | "GetSample" >> beam.CombineGlobally(sample_fn))
-
-  # Actually performs the undersampling functionality.
-  # Output format is a K-V PCollection: {class_label: TFRecord in string format}
-  res = (data
-         | "GroupBylabel" >> beam.GroupByKey()
-         | "FilterNull" >>
-         beam.Filter(lambda x: filter_null(x, null_vals=null_classes))
-         | "Sample" >> beam.FlatMapTuple(sample_data,
-                                         sampling_strategy=sampling_strategy,
-                                         side=beam.pvalue.AsSingleton(val)))
-
-  # Take out all the null values from the beginning and put them back in the pipeline
-  null = (data
-          | "ExtractNull" >> beam.Filter(
-              lambda x: filter_null(x, keep_null=True, null_vals=null_classes))
-          | "NullValues" >> beam.Values())
-  return (res, null) | "Merge PCollections" >> beam.Flatten()
-
-
-def write_tfexamples(examples, shards, output_dir):
-  # Write the final set of TFRecords to the output artifact's files.
+  # Split the null values out in one pass, and put them back in the pipeline
+  # after sampling.
+  partitioned = (data
+                 | "PartitionByNull" >> beam.ParDo(
+                     PartitionByNullDoFn(null_classes)).with_outputs(
+                         "null", "valued"))
+
+  # Finds the number of examples to sample from every class, from the class
+  # counts alone, which are cheap to combine.
+  # Output is a singleton PCollection with the target # of examples.
+  #
+  # This is a second traversal of the valued examples, and the reservoirs
+  # below take its result as a side input, so the runner has to materialize
+  # the valued examples until the counts are done, much like the GroupByKey
+  # this replaced. Counting and sampling in a single pass would need the
+  # reservoirs to be sized before the target is known, which either keeps
+  # whole classes in the combiner or changes which examples can be sampled.
+  # The single pass is given up so that memory stays bounded by the target
+  # and the results stay exact.
+  val = count_target_size(partitioned.valued, sampling_strategy)
+  side = beam.pvalue.AsSingleton(val)
+
+  # Keeps a random reservoir of at most the target # of examples per class.
+  # Since sampled classes are usually heavily unbalanced, each class is first
+  # spread over several intermediate keys so that the majority class is
+  # combined in parallel. Class labels are used as shuffle keys as decoded:
+  # every combine here is lifted, so only per-bundle partial results, one per
+  # class and fanout key, cross the shuffle, and their keys are small next to
+  # the reservoirs they carry. Output format is a K-V PCollection:
+  # {class_label: (count, reservoir of TFRecords in string format)}
+  combined = (partitioned.valued
+              | "AddFanoutKeys" >> beam.Map(_add_fanout_key, _COMBINE_FANOUT)
+              | "PartialReservoirs" >> beam.CombinePerKey(
+                  ReservoirSampleFn(), side)
+              | "RemoveFanoutKeys" >> beam.MapTuple(
+                  lambda key, output: (key[0], output))
+              | "CountAndReservoir" >> beam.CombinePerKey(
+                  MergeReservoirsFn(), side))
+
+  # Actually performs the sampling functionality on each class's reservoir,
+  # one class at a time. Output format is a PCollection of TFRecords in string
+  # format.
+  res = (combined
+         | "Reservoirs" >> beam.MapTuple(lambda key, output: (key, output[1]))
+         | "Sample" >> beam.FlatMapTuple(_sample_reservoir, side=side))
+
+  return (res, partitioned.null) | "Merge PCollections" >> beam.Flatten()
+
+
+def write_tfexamples(examples,
+                     shards,
+                     output_dir,
+                     compression_type=spec.CompressionType.GZIP):
+  """Function that writes the final set of TFRecords to the output artifact's
+  files.
+
+  The examples are kept in serialized format throughout the pipeline, so they
+  are passed through as raw bytes with BytesCoder, without being parsed or
+  re-serialized."""
+
+  beam_compression_type, suffix = _COMPRESSION_TYPES[compression_type]
   _ = (examples
-       | "Serialize" >> beam.Map(lambda x: x.SerializeToString())
        | "WriteToTFRecord" >> beam.io.tfrecordio.WriteToTFRecord(
            output_dir,
-           file_name_suffix=".gz",
+           file_name_suffix=suffix,
            num_shards=shards,
-           compression_type=beam.io.filesystem.CompressionTypes.GZIP,
+           compression_type=beam_compression_type,
+           coder=beam.coders.BytesCoder(),
        ))
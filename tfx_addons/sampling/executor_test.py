@@ -222,12 +222,30 @@ class ExecutorTest(absltest.TestCase):
                                 null_vals=["5"])  # return
     assert executor.filter_null(["", ""], keep_null=True,
                                 null_vals=["5"])  # return
+    assert not executor.filter_null(["5", 5], null_vals=["5"])  # no return
+    assert not executor.filter_null([None, 5], null_vals=["None"])  # no return
+    assert executor.filter_null([5, 5], null_vals=["05"])  # return
+    assert executor.filter_null([2, 5], null_vals=["\u00b2"])  # return
+    assert not executor.filter_null(["\u00b2", 5],
+                                    null_vals=["\u00b2"])  # no return
+    assert executor.filter_null([-5, 5], null_vals=["--5"])  # return
+    assert not executor.filter_null([-5, 5], null_vals=["-5"])  # no return
+
+  def testPartitionByNull(self):
+    partition_fn = executor.PartitionByNullDoFn(["5"])
+    for item, tag, value in [((5, b"5"), "null", b"5"),
+                             (("", b"0"), "null", b"0"),
+                             ((0, b"0"), "valued", (0, b"0")),
+                             (("6", b"6"), "valued", ("6", b"6"))]:
+      output, = partition_fn.process(item)
+      self.assertEqual(output.tag, tag)
+      self.assertEqual(output.value, value)
 
   def testPipelineMin(self):
     random.seed(0)
-    dataset = [("1", 1), ("1", 1), ("1", 1), ("2", 2), ("2", 2), ("2", 2),
-               ("2", 2), ("3", 3), ("3", 3), ("", 0)]
-    expected = [1, 1, 2, 2, 3, 3, 0]
+    dataset = [("1", b"1"), ("1", b"1"), ("1", b"1"), ("2", b"2"), ("2", b"2"),
+               ("2", b"2"), ("2", b"2"), ("3", b"3"), ("3", b"3"), ("", b"0")]
+    expected = [b"1", b"1", b"2", b"2", b"3", b"3", b"0"]
 
     with beam.Pipeline() as p:
       data = p | beam.Create(dataset)
@@ -237,9 +255,12 @@ class ExecutorTest(absltest.TestCase):
 
   def testPipelineMax(self):
     random.seed(0)
-    dataset = [("1", 1), ("1", 1), ("1", 1), ("2", 2), ("2", 2), ("2", 2),
-               ("2", 2), ("3", 3), ("3", 3), ("", 0)]
-    expected = [1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 0]
+    dataset = [("1", b"1"), ("1", b"1"), ("1", b"1"), ("2", b"2"), ("2", b"2"),
+               ("2", b"2"), ("2", b"2"), ("3", b"3"), ("3", b"3"), ("", b"0")]
+    expected = [
+        b"1", b"1", b"1", b"1", b"2", b"2", b"2", b"2", b"3", b"3", b"3", b"3",
+        b"0"
+    ]
 
     with beam.Pipeline() as p:
       data = p | beam.Create(dataset)
@@ -247,38 +268,133 @@ class ExecutorTest(absltest.TestCase):
                                         spec.SamplingStrategy.OVERSAMPLE)
       assert_that(merged, equal_to(expected))
 
-  def testMinimum(self):
-    dataset = [("1", 1), ("1", 1), ("1", 1), ("2", 2), ("2", 2), ("2", 2),
-               ("2", 2), ("3", 3), ("3", 3), ("", 0)]
+  def testReservoirSample(self):
+    random.seed(0)
+    fn = executor.ReservoirSampleFn()
+    accumulators = []
+    for chunk in (range(0, 10), range(10, 13), range(13, 40)):
+      acc = fn.create_accumulator(5)
+      for x in chunk:
+        acc = fn.add_input(acc, str(x).encode(), 5)
+      accumulators.append(acc)
+    count, reservoir = fn.extract_output(fn.merge_accumulators(accumulators, 5),
+                                         5)
+    self.assertEqual(count, 40)
+    self.assertLen(reservoir, 5)
+    self.assertLen(set(reservoir), 5)
+    self.assertTrue(set(reservoir) <= {str(x).encode() for x in range(40)})
+
+  def testWriteCompression(self):
+    examples = [b"a", b"b", b"c"]
+    for compression_type, suffix in ((spec.CompressionType.GZIP, ".gz"),
+                                      (spec.CompressionType.UNCOMPRESSED, "")):
+      output_dir = os.path.join(tempfile.mkdtemp(), "Split-train")
+      with beam.Pipeline() as p:
+        executor.write_tfexamples(p | beam.Create(examples), 1, output_dir,
+                                  compression_type)
+      files = fileio.glob(f"{output_dir}*")
+      self.assertLen(files, 1)
+      self.assertTrue(files[0].endswith(f"-of-00001{suffix}"))
+
+      with beam.Pipeline() as p:
+        data = p | beam.io.ReadFromTFRecord(files[0])
+        assert_that(data, equal_to(examples))
+
+  def testReadCompression(self):
+    examples = [
+        tf.train.Example(features=tf.train.Features(
+            feature={
+                "label":
+                tf.train.Feature(int64_list=tf.train.Int64List(value=[i]))
+            })).SerializeToString() for i in range(3)
+    ]
+    input_dir = tempfile.mkdtemp()
+    with beam.Pipeline() as p:
+      _ = (p
+           | beam.Create(examples)
+           | beam.io.WriteToTFRecord(
+               os.path.join(input_dir, "data_tfrecord"),
+               num_shards=1,
+               compression_type=beam.io.filesystem.CompressionTypes.GZIP))
+
+    # GZIP shards are read as such even without a .gz extension.
+    with beam.Pipeline() as p:
+      data = executor.read_tfexamples(p, input_dir, "label")
+      assert_that(data, equal_to(list(zip(range(3), examples))))
+
+  def testWriteReadRoundTrip(self):
+    examples = [
+        tf.train.Example(features=tf.train.Features(
+            feature={
+                "label":
+                tf.train.Feature(int64_list=tf.train.Int64List(value=[i]))
+            })).SerializeToString() for i in range(3)
+    ]
+    for compression_type in spec.CompressionType:
+      output_dir = tempfile.mkdtemp()
+      with beam.Pipeline() as p:
+        executor.write_tfexamples(p | beam.Create(examples), 2,
+                                  os.path.join(output_dir, "Split-train"),
+                                  compression_type)
+
+      # A Sampler can read the output of another Sampler.
+      with beam.Pipeline() as p:
+        data = executor.read_tfexamples(p, output_dir, "label")
+        assert_that(data, equal_to(list(zip(range(3), examples))))
+
+  def testSampleData(self):
+    strategy = spec.SamplingStrategy.UNDERSAMPLE
+    under = list(
+        executor.sample_data("1",
+                             iter(range(10)),
+                             sampling_strategy=strategy,
+                             side=4))
+    assert len(under) == len(set(under)) == 4
+    assert set(under) <= set(range(10))
+
+    strategy = spec.SamplingStrategy.OVERSAMPLE
+    over = list(
+        executor.sample_data("1",
+                             list(range(3)),
+                             sampling_strategy=strategy,
+                             side=7))
+    assert len(over) == 7
+    assert set(over) <= set(range(3))
+
+    # Duplicates come out in draw order, not grouped in input order.
+    random.seed(0)
+    over = list(
+        executor.sample_data("1",
+                             list(range(3)),
+                             sampling_strategy=strategy,
+                             side=50))
+    assert over != sorted(over)
 
-    def find_minimum(elements):
-      return min(elements or [0])
+    with self.assertRaises(ValueError):
+      list(executor.sample_data("1", iter(range(3)), side=4))
+
+  def testMinimum(self):
+    dataset = [("1", b"1"), ("1", b"1"), ("1", b"1"), ("2", b"2"), ("2", b"2"),
+               ("2", b"2"), ("2", b"2"), ("3", b"3"), ("3", b"3"), ("", b"0")]
 
     with beam.Pipeline() as p:
-      val = (p
-             | beam.Create(dataset)
-             | "CountPerKey" >> beam.combiners.Count.PerKey()
-             | "FilterNullCount" >>
-             beam.Filter(lambda x: executor.filter_null(x, null_vals=None))
-             | "Values" >> beam.Values()
-             | "GetSample" >> beam.CombineGlobally(find_minimum))
+      data = (p
+              | beam.Create(dataset)
+              | "FilterNull" >>
+              beam.Filter(lambda x: executor.filter_null(x, null_vals=None)))
+      val = executor.count_target_size(data, spec.SamplingStrategy.UNDERSAMPLE)
       assert_that(val, equal_to([2]))
 
   def testMaximum(self):
-    dataset = [("1", 1), ("1", 1), ("1", 1), ("2", 2), ("2", 2), ("2", 2),
-               ("2", 2), ("3", 3), ("3", 3), ("", 0)]
-
-    def find_maximum(elements):
-      return max(elements or [0])
+    dataset = [("1", b"1"), ("1", b"1"), ("1", b"1"), ("2", b"2"), ("2", b"2"),
+               ("2", b"2"), ("2", b"2"), ("3", b"3"), ("3", b"3"), ("", b"0")]
 
     with beam.Pipeline() as p:
-      val = (p
-             | beam.Create(dataset)
-             | "CountPerKey" >> beam.combiners.Count.PerKey()
-             | "FilterNullCount" >>
-             beam.Filter(lambda x: executor.filter_null(x, null_vals=None))
-             | "Values" >> beam.Values()
-             | "GetSample" >> beam.CombineGlobally(find_maximum))
+      data = (p
+              | beam.Create(dataset)
+              | "FilterNull" >>
+              beam.Filter(lambda x: executor.filter_null(x, null_vals=None)))
+      val = executor.count_target_size(data, spec.SamplingStrategy.OVERSAMPLE)
       assert_that(val, equal_to([4]))
 
   def testException(self):
@@ -30,6 +30,7 @@ SAMPLER_COPY_KEY = 'copy_others'
 SAMPLER_SHARDS_KEY = 'shards'
 SAMPLER_CLASSES_KEY = 'null_classes'
 SAMPLER_SAMPLE_KEY = 'sampling_strategy'
+SAMPLER_COMPRESSION_KEY = 'compression_type'
 
 
 class SamplingStrategy(enum.IntEnum):
@@ -38,6 +39,12 @@ class SamplingStrategy(enum.IntEnum):
   OVERSAMPLE = 2
 
 
+class CompressionType(enum.IntEnum):
+  """Determines how the sampled TFRecord files are compressed."""
+  GZIP = 1
+  UNCOMPRESSED = 2
+
+
 class SamplerSpec(types.ComponentSpec):
   """Sampling component spec."""
 
@@ -48,7 +55,8 @@ class SamplerSpec(types.ComponentSpec):
       SAMPLER_COPY_KEY: ExecutionParameter(type=int, optional=True),
       SAMPLER_SHARDS_KEY: ExecutionParameter(type=int, optional=True),
       SAMPLER_CLASSES_KEY: ExecutionParameter(type=str, optional=True),
-      SAMPLER_SAMPLE_KEY: ExecutionParameter(type=int, optional=True)
+      SAMPLER_SAMPLE_KEY: ExecutionParameter(type=int, optional=True),
+      SAMPLER_COMPRESSION_KEY: ExecutionParameter(type=int, optional=True)
   }
   INPUTS = {
       SAMPLER_INPUT_KEY: ChannelParameter(type=standard_artifacts.Examples),